@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Destination, Package, PackageImage, Offer, Booking, Payment
+from .models import Destination, Package, PackageImage, Offer, Booking, Payment, ArchivedBooking, BookingSummary
 
 class PackageImageInline(admin.TabularInline):
     model = PackageImage
@@ -19,3 +19,5 @@ class DestinationAdmin(admin.ModelAdmin):
 admin.site.register(Offer)
 admin.site.register(Booking)
 admin.site.register(Payment)
+admin.site.register(ArchivedBooking)
+admin.site.register(BookingSummary)
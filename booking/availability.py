@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from collections import Counter
+
+from django.conf import settings
+
+from booking.models import Package
+
+logger = logging.getLogger(__name__)
+
+# One hub per ASGI worker process. Every open availability stream in the process
+# shares it, so N viewers of a package cost one DB poll, not N.
+_hub = None
+
+
+class AvailabilityHub:
+    """Tracks ``available_slots`` for the packages someone is watching and wakes their streams on change.
+
+    A single poller task queries all watched packages together. ``notify()``
+    wakes it early, and notifications that arrive within
+    ``AVAILABILITY_COALESCE_SECONDS`` of each other collapse into one query and
+    one push per stream. Changes made by other processes are picked up by the
+    regular ``AVAILABILITY_POLL_SECONDS`` poll.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.slots = {}
+        self.watchers = Counter()
+        self.changed = {}
+        self.wake = asyncio.Event()
+        self.poller = None
+
+    def subscribe(self, package_id, slots):
+        """Start watching a package; ``slots`` is the caller's fresh read and replaces an older cached value."""
+        self.watchers[package_id] += 1
+        self.changed.setdefault(package_id, asyncio.Event())
+        self.update(package_id, slots)
+        if self.poller is None:
+            self.poller = self.loop.create_task(self.run())
+
+    def unsubscribe(self, package_id):
+        self.watchers[package_id] -= 1
+        if self.watchers[package_id] <= 0:
+            del self.watchers[package_id]
+            self.slots.pop(package_id, None)
+            self.changed.pop(package_id, None)
+
+    async def wait_for_change(self, package_id, timeout):
+        """Return True when the package's slots change, False after ``timeout`` seconds."""
+        try:
+            await asyncio.wait_for(self.changed[package_id].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self):
+        poll = getattr(settings, "AVAILABILITY_POLL_SECONDS", 5)
+        failures = 0
+        try:
+            while self.watchers:
+                if failures:
+                    # Back off while the database is failing (e.g. SQLite "database is locked").
+                    await asyncio.sleep(min(poll * 2 ** (failures - 1), 60))
+                else:
+                    try:
+                        await asyncio.wait_for(self.wake.wait(), poll)
+                        await asyncio.sleep(getattr(settings, "AVAILABILITY_COALESCE_SECONDS", 0.25))
+                    except asyncio.TimeoutError:
+                        pass
+                self.wake.clear()
+                try:
+                    await self.refresh()
+                except Exception:
+                    # Open streams depend on this task; keep polling rather than die silently.
+                    failures += 1
+                    logger.exception("Availability refresh failed (%d in a row); retrying", failures)
+                else:
+                    failures = 0
+        finally:
+            self.poller = None
+
+    def update(self, package_id, slots):
+        if self.slots.get(package_id) == slots:
+            return
+        self.slots[package_id] = slots
+        # Swap in a fresh event before firing so woken streams wait on the next change.
+        event, self.changed[package_id] = self.changed[package_id], asyncio.Event()
+        event.set()
+
+    async def refresh(self):
+        rows = Package.objects.filter(id__in=list(self.watchers)).values_list("id", "available_slots")
+        async for package_id, slots in rows:
+            if package_id in self.watchers:
+                self.update(package_id, slots)
+
+
+def get_hub():
+    global _hub
+    if _hub is None or _hub.loop is not asyncio.get_running_loop():
+        _hub = AvailabilityHub()
+    return _hub
+
+
+def notify(package_id):
+    """Ask this process's hub to re-check availability soon; safe to call from sync views."""
+    hub = _hub
+    if hub is not None and package_id in hub.watchers and not hub.loop.is_closed():
+        hub.loop.call_soon_threadsafe(hub.wake.set)
+
+
+def format_event(package_id, slots):
+    return f"event: availability\ndata: {{\"package\": {package_id}, \"available_slots\": {slots}}}\n\n"
+
+
+async def stream(package_id, slots):
+    hub = get_hub()
+    hub.subscribe(package_id, slots)
+    heartbeat = getattr(settings, "AVAILABILITY_HEARTBEAT_SECONDS", 15)
+    try:
+        yield "retry: 5000\n\n"
+        yield format_event(package_id, slots)
+        sent = slots
+        while True:
+            current = hub.slots[package_id]
+            if current != sent:
+                yield format_event(package_id, current)
+                sent = current
+            elif not await hub.wait_for_change(package_id, heartbeat):
+                # SSE comment line; keeps proxies from closing idle connections.
+                yield ": keep-alive\n\n"
+    finally:
+        hub.unsubscribe(package_id)
@@ -0,0 +1,80 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from booking.models import Booking, Destination, Package, Payment
+
+BENCH_PASSWORD = "bench-password"
+
+
+def generate(destinations=5, packages_per_destination=10, users=20, bookings_per_user=5,
+             prefix="bench", seed=0):
+    """Bulk-create a synthetic catalogue, users and bookings; returns the created rows by kind."""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+
+    Destination.objects.bulk_create(
+        Destination(name=f"{prefix.title()} destination {d}", slug=f"{prefix}-dest-{d}",
+                    country="India", description="Synthetic destination. " * 20)
+        for d in range(destinations)
+    )
+    dests = list(Destination.objects.filter(slug__startswith=f"{prefix}-dest-"))
+
+    Package.objects.bulk_create(
+        Package(
+            destination=dest,
+            title=f"{dest.name} package {p}",
+            slug=f"{prefix}-pkg-{dest.id}-{p}",
+            short_description="A short synthetic description for the card.",
+            description="Long itinerary text. " * 200,
+            price=Decimal(rng.randrange(5000, 50000)),
+            duration_days=rng.randrange(2, 10),
+            start_date=today + datetime.timedelta(days=30),
+            end_date=today + datetime.timedelta(days=37),
+            cover_image=f"packages/{prefix}-{p}.jpg",
+        )
+        for dest in dests
+        for p in range(packages_per_destination)
+    )
+    packages = list(Package.objects.filter(slug__startswith=f"{prefix}-pkg-"))
+
+    # Hash once; hashing per user would dominate generation time.
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create(
+        User(username=f"{prefix}-user-{u}", email=f"{prefix}-user-{u}@example.com", password=password)
+        for u in range(users)
+    )
+    bench_users = list(User.objects.filter(username__startswith=f"{prefix}-user-"))
+
+    now = timezone.now()
+    Booking.objects.bulk_create(
+        Booking(
+            user=user,
+            package=package,
+            travelers=travelers,
+            total_amount=package.price * travelers,
+            status=rng.choice(["PENDING", "CONFIRMED", "CANCELLED"]),
+        )
+        for user in bench_users
+        for package, travelers in (
+            (rng.choice(packages), rng.randrange(1, 5)) for _ in range(bookings_per_user)
+        )
+    )
+    bookings = list(Booking.objects.filter(user__in=bench_users))
+    # auto_now_add stamps booking_time on insert, so spread the times afterwards.
+    for booking in bookings:
+        booking.booking_time = now - datetime.timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+    Booking.objects.bulk_update(bookings, ["booking_time"], batch_size=500)
+
+    Payment.objects.bulk_create(
+        Payment(booking=booking, amount=booking.total_amount, razorpay_order_id=f"order_{prefix}_{booking.id}",
+                paid=booking.status == "CONFIRMED", paid_at=now if booking.status == "CONFIRMED" else None)
+        for booking in bookings
+        if booking.status != "PENDING"
+    )
+
+    return {"destinations": dests, "packages": packages, "users": bench_users, "bookings": bookings}
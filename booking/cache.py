@@ -0,0 +1,115 @@
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class CounterFileCache(FileBasedCache):
+    """FileBasedCache made safe for counters shared by several worker processes.
+
+    The stock backend has two problems for rate limiting: ``add()`` and
+    ``incr()`` are unlocked read-then-write, so concurrent workers lose counts,
+    and once ``MAX_ENTRIES`` is reached every write deletes a random third of
+    the files, live counters included. Here ``add()`` creates the file
+    atomically, ``incr()`` rewrites it under an exclusive lock, and culling
+    drops expired files first, then the least recently written ones.
+    """
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, "wb") as f:
+                self._write_content(f, timeout, value)
+            for _ in range(2):
+                try:
+                    # link() fails if the name exists, so only one worker can create the entry.
+                    os.link(tmp_path, fname)
+                except FileExistsError:
+                    if not self._expired(fname):
+                        return False
+                    self._delete(fname)
+                else:
+                    self._cull()
+                    return True
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def get(self, key, default=None, version=None):
+        try:
+            with open(self._key_to_file(key, version), "rb") as f:
+                locks.lock(f, locks.LOCK_SH)
+                try:
+                    expiry, value = self._read(f)
+                finally:
+                    locks.unlock(f)
+        except FileNotFoundError:
+            return default
+        if expiry is not None and expiry < time.time():
+            return default
+        return value
+
+    def incr(self, key, delta=1, version=None):
+        try:
+            with open(self._key_to_file(key, version), "r+b") as f:
+                locks.lock(f, locks.LOCK_EX)
+                try:
+                    expiry, value = self._read(f)
+                    if expiry is not None and expiry < time.time():
+                        raise ValueError(f"Key '{key}' not found")
+                    value += delta
+                    f.seek(0)
+                    f.write(pickle.dumps(expiry, self.pickle_protocol))
+                    f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+                    f.truncate()
+                    return value
+                finally:
+                    locks.unlock(f)
+        except FileNotFoundError:
+            raise ValueError(f"Key '{key}' not found") from None
+
+    def _read(self, f):
+        try:
+            expiry = pickle.load(f)
+        except EOFError:
+            return 0, None  # An empty file is considered expired.
+        return expiry, pickle.loads(zlib.decompress(f.read()))
+
+    def _expired(self, fname):
+        try:
+            with open(fname, "rb") as f:
+                expiry = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except EOFError:
+            return True
+        return expiry is not None and expiry < time.time()
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        live = []
+        for fname in filelist:
+            if self._expired(fname):
+                self._delete(fname)
+            else:
+                live.append(fname)
+        excess = len(live) - self._max_entries + 1
+        if excess > 0:
+            def mtime(fname):
+                try:
+                    return os.path.getmtime(fname)
+                except FileNotFoundError:
+                    return 0
+            if self._cull_frequency:
+                excess = max(excess, len(live) // self._cull_frequency)
+            for fname in sorted(live, key=mtime)[:excess]:
+                self._delete(fname)
@@ -0,0 +1,69 @@
+import datetime
+import time
+import tracemalloc
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.shortcuts import render
+from django.test import RequestFactory, override_settings
+
+from booking.models import Destination, Package
+
+
+class Command(BaseCommand):
+    help = "Compare memory and render time of holiday_packages with full Package rows versus card projections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/holidays/")
+        request.user = AnonymousUser()
+        # Synthetic rows live only inside this transaction and are rolled back, so
+        # reads must stay on the primary connection that holds it.
+        with transaction.atomic(), override_settings(DATABASE_REPLICAS=[]):
+            self.populate(options["cards"])
+            for label, queryset in (
+                ("full rows", lambda: Package.objects.filter(slug__startswith="bench-")),
+                ("cards", lambda: Package.objects.filter(slug__startswith="bench-").cards()),
+            ):
+                elapsed, peak = self.measure(request, queryset, options["repeat"])
+                per_k = 1000 / options["cards"]
+                self.stdout.write(
+                    f"{label:>9}: {elapsed * 1000 * per_k:.1f} ms and "
+                    f"{peak / 1024 * per_k:.0f} KiB peak per 1k cards"
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, count):
+        destination = Destination.objects.create(name="Bench", slug="bench-destination")
+        today = datetime.date.today()
+        Package.objects.bulk_create(
+            Package(
+                destination=destination,
+                title=f"Bench package {i}",
+                slug=f"bench-{i}",
+                short_description="A short synthetic description for the card.",
+                description="Long itinerary text. " * 400,
+                price=9999,
+                start_date=today,
+                end_date=today,
+                cover_image=f"packages/bench-{i}.jpg",
+            )
+            for i in range(count)
+        )
+
+    def measure(self, request, queryset, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(request, "booking/holiday_packages.html", {"packages": queryset()})
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        render(request, "booking/holiday_packages.html", {"packages": queryset()})
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from booking import benchdata, summaries
+from booking.models import Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare profile dashboard latency served from BookingSummary with aggregating the "
+        "user's bookings on every request, for a small and a large booking history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10000])
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Only "default" gets a test database, so keep catalogue reads off the replicas.
+            with override_settings(RATELIMIT_ENABLED=False, DATABASE_REPLICAS=[]):
+                for size in options["sizes"]:
+                    data = benchdata.generate(destinations=2, packages_per_destination=10, users=1,
+                                              bookings_per_user=size, prefix=f"dash{size}")
+                    self.bench(data["users"][0], size, options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def bench(self, user, size, repeat):
+        summaries.rebuild()
+        client = Client()
+        client.force_login(user)
+        url = reverse("profile")
+        client.get(url)
+        page = self.time(lambda: client.get(url), repeat)
+        lookup = self.time(lambda: summaries.get_summary(user), repeat)
+        aggregate = self.time(lambda: self.aggregate(user), repeat)
+        self.stdout.write(
+            f"{size:>6} bookings: profile page {page:7.2f} ms | summary lookup {lookup:6.3f} ms | "
+            f"on-the-fly aggregate {aggregate:7.3f} ms"
+        )
+
+    def aggregate(self, user):
+        today = timezone.localdate()
+        return Booking.objects.filter(user=user, status="CONFIRMED").aggregate(
+            trips_taken=Count("id", filter=Q(package__end_date__lt=today)),
+            upcoming_trips=Count("id", filter=Q(package__end_date__gte=today)),
+            amount_spent=Sum("total_amount"),
+        )
+
+    def time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,193 @@
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import statistics
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import resolve, reverse
+
+from booking import benchdata, tickets
+
+STEPS = ["home", "package_detail", "book_package", "make_payment", "verify_payment", "download_ticket"]
+
+
+class FakeRazorpayClient:
+    """Stands in for razorpay.Client so the funnel never calls the real gateway."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, auth=None):
+        self.order = self
+
+    def create(self, data):
+        return {"id": f"order_fake_{next(self._ids)}", "amount": data["amount"], "currency": data["currency"]}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the booking funnel (home -> package_detail -> book_package -> make_payment "
+        "-> verify_payment -> download_ticket) on a throwaway test database, recording latency, "
+        "query count and peak memory per step, and compare against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--destinations", type=int, default=10)
+        parser.add_argument("--packages", type=int, default=20, help="Packages per destination.")
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--bookings", type=int, default=10, help="Existing bookings per user.")
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument("--output", help="Write results to this JSON file.")
+        parser.add_argument("--baseline", help="Compare results with this JSON file.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed relative slowdown before a step counts as a regression.")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("--iterations must be at least 2 (the last pass only traces memory).")
+        # xhtml2pdf warns about every unsupported CSS rule in the ticket template.
+        logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                MEDIA_ROOT=media_root,
+                EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                RATELIMIT_ENABLED=False,
+                # Only "default" gets a test database, so keep catalogue reads off the replicas.
+                DATABASE_REPLICAS=[],
+            ), mock.patch("razorpay.Client", FakeRazorpayClient):
+                data = benchdata.generate(
+                    destinations=options["destinations"],
+                    packages_per_destination=options["packages"],
+                    users=options["users"],
+                    bookings_per_user=options["bookings"],
+                )
+                tickets.warm_up()
+                results = self.run_funnel(data, options["iterations"])
+        finally:
+            tickets.shutdown()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        results["scale"] = {key: options[key] for key in ("destinations", "packages", "users", "bookings")}
+        for step in STEPS:
+            r = results["steps"][step]
+            self.stdout.write(
+                f"{step:>16}: p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                f"{r['queries']:3d} queries  {r['peak_kib']:8.0f} KiB peak"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["tolerance"])
+
+    def run_funnel(self, data, iterations):
+        user = data["users"][0]
+        client = Client()
+        client.force_login(user)
+        timings = {step: [] for step in STEPS}
+        queries = {}
+        peaks = {}
+
+        for i in range(iterations):
+            package = data["packages"][i % len(data["packages"])]
+            state = {}
+            # Memory is traced on the last pass only, so tracing does not skew latency.
+            traced = i == iterations - 1
+            for step in STEPS:
+                if traced:
+                    tracemalloc.start()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = self.request(client, step, package, state)
+                    elapsed = time.perf_counter() - start
+                if traced:
+                    peaks[step] = tracemalloc.get_traced_memory()[1] / 1024
+                    tracemalloc.stop()
+                else:
+                    timings[step].append(elapsed * 1000)
+                if response.status_code >= 400:
+                    raise CommandError(f"{step} returned {response.status_code}")
+                queries[step] = len(captured)
+
+        return {
+            "iterations": iterations,
+            "emails_sent": len(mail.outbox),
+            "steps": {
+                step: {
+                    "p50_ms": statistics.median(timings[step]),
+                    "p95_ms": self.percentile(timings[step], 95),
+                    "queries": queries[step],
+                    "peak_kib": peaks[step],
+                }
+                for step in STEPS
+            },
+        }
+
+    def request(self, client, step, package, state):
+        if step == "home":
+            return client.get(reverse("home"))
+        if step == "package_detail":
+            return client.get(reverse("package_detail", args=[package.slug]))
+        if step == "book_package":
+            response = client.post(reverse("book_package", args=[package.id]), {"travelers": 2})
+            state["booking_id"] = resolve(response["Location"]).kwargs["booking_id"]
+            return response
+        if step == "make_payment":
+            response = client.get(reverse("make_payment", args=[state["booking_id"]]))
+            state["order_id"] = response.context["razorpay_order_id"]
+            return response
+        if step == "verify_payment":
+            payment_id = f"pay_fake_{state['booking_id']}"
+            signature = hmac.new(
+                bytes(settings.RAZORPAY_KEY_SECRET, "utf-8"),
+                msg=bytes(state["order_id"] + "|" + payment_id, "utf-8"),
+                digestmod=hashlib.sha256,
+            ).hexdigest()
+            return client.post(reverse("verify_payment"), json.dumps({
+                "booking_id": state["booking_id"],
+                "razorpay_order_id": state["order_id"],
+                "razorpay_payment_id": payment_id,
+                "razorpay_signature": signature,
+            }), content_type="application/json")
+        if step == "download_ticket":
+            response = client.get(reverse("download_ticket", args=[state["booking_id"]]))
+            b"".join(response.streaming_content)
+            response.close()
+            return response
+        raise CommandError(f"Unknown step {step}")
+
+    def percentile(self, values, pct):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def compare(self, results, baseline_path, tolerance):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = []
+        for step in STEPS:
+            old = baseline["steps"].get(step)
+            if old is None:
+                continue
+            new = results["steps"][step]
+            if new["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+                regressions.append(f"{step}: p50 {old['p50_ms']:.2f} -> {new['p50_ms']:.2f} ms")
+            if new["queries"] > old["queries"]:
+                regressions.append(f"{step}: queries {old['queries']} -> {new['queries']}")
+            if new["peak_kib"] > old["peak_kib"] * (1 + tolerance):
+                regressions.append(f"{step}: peak {old['peak_kib']:.0f} -> {new['peak_kib']:.0f} KiB")
+        if regressions:
+            raise CommandError("Performance regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from booking import ratelimit
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of the rate limiter for each backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20000)
+        parser.add_argument("--clients", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        factory = RequestFactory()
+        requests = [
+            factory.get("/search/", REMOTE_ADDR=f"10.0.{i // 256}.{i % 256}")
+            for i in range(options["clients"])
+        ]
+
+        def view(request):
+            return HttpResponse("ok")
+
+        baseline = self.run(view, requests, total)
+        self.stdout.write(f"undecorated view: {baseline * 1e6:.2f} us/request")
+
+        policies = {"bench": [("ip", f"{total}/m")]}
+        for backend in ("memory", "cache"):
+            with override_settings(RATELIMIT_BACKEND=backend, RATELIMIT_POLICIES=policies):
+                ratelimit.get_backend().reset()
+                elapsed = self.run(ratelimit.ratelimit("bench")(view), requests, total)
+                ratelimit.get_backend().reset()
+            self.stdout.write(
+                f"{backend:>6} backend: {elapsed * 1e6:.2f} us/request "
+                f"(+{(elapsed - baseline) * 1e6:.2f} us overhead)"
+            )
+
+    def run(self, view, requests, total):
+        count = len(requests)
+        start = time.perf_counter()
+        for i in range(total):
+            view(requests[i % count])
+        return (time.perf_counter() - start) / total
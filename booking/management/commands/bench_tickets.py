@@ -0,0 +1,51 @@
+import datetime
+import logging
+import os
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from booking import tickets
+from booking.models import Booking, Destination, Package
+
+
+class Command(BaseCommand):
+    help = "Measure ticket PDFs rendered per second through the batch API for a range of worker counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=50)
+        parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+        bookings = self.fake_bookings(options["tickets"])
+
+        for workers in [0, *range(1, options["max_workers"] + 1)]:
+            with override_settings(TICKET_PDF_WORKERS=workers):
+                tickets.warm_up()
+                start = time.perf_counter()
+                pdfs = tickets.render_tickets(bookings)
+                elapsed = time.perf_counter() - start
+                tickets.shutdown()
+            label = "inline" if workers == 0 else f"{workers} worker(s)"
+            failed = sum(1 for pdf in pdfs.values() if pdf is None)
+            self.stdout.write(
+                f"{label:>12}: {len(bookings) / elapsed:6.1f} tickets/s ({elapsed:.2f}s, {failed} failed)"
+            )
+
+    def fake_bookings(self, count):
+        # Unsaved instances are enough to render the template; nothing touches the database.
+        destination = Destination(name="Goa", country="India")
+        today = datetime.date.today()
+        bookings = []
+        for i in range(1, count + 1):
+            package = Package(destination=destination, title=f"Bench package {i}", price=Decimal("9999"),
+                              start_date=today, end_date=today)
+            booking = Booking(id=i, user=User(username=f"bench-user-{i}"), package=package,
+                              travelers=2, total_amount=Decimal("19998"), status="CONFIRMED",
+                              qr_code=f"qr/qr_{i}.png")
+            bookings.append(booking)
+        return bookings
@@ -0,0 +1,103 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from booking.models import ArchivedBooking, Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel abandoned PENDING bookings and move old cancelled bookings to the "
+        "archive table, in small batches so no write lock is held for long. "
+        "Meant to run from a scheduler (cron / scheduled task)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--pause", type=float, default=0.05,
+                            help="Seconds to sleep between batches so requests can take the write lock.")
+        parser.add_argument("--no-archive", action="store_true")
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.pause = options["pause"]
+        self.max_lock = 0.0
+        now = timezone.now()
+
+        pending_cutoff = now - datetime.timedelta(minutes=getattr(settings, "PENDING_BOOKING_TTL_MINUTES", 30))
+        self.report("cancelled", self.sweep(self.cancel_batch, Booking.objects.filter(
+            status="PENDING", booking_time__lt=pending_cutoff,
+        )))
+
+        if not options["no_archive"]:
+            archive_cutoff = now - datetime.timedelta(days=getattr(settings, "BOOKING_ARCHIVE_AFTER_DAYS", 90))
+            self.report("archived", self.sweep(self.archive_batch, Booking.objects.filter(
+                status="CANCELLED", booking_time__lt=archive_cutoff,
+            )))
+
+        self.stdout.write(f"max lock held: {self.max_lock * 1000:.1f} ms")
+
+    def sweep(self, handle_batch, queryset):
+        total = 0
+        start = time.perf_counter()
+        last_id = 0
+        while True:
+            # Reads happen outside the transaction; only the batch write holds the lock.
+            ids = list(queryset.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:self.batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            total += handle_batch(ids)
+            if self.pause:
+                time.sleep(self.pause)
+        return total, time.perf_counter() - start
+
+    def cancel_batch(self, ids):
+        lock_start = time.perf_counter()
+        with transaction.atomic():
+            # Re-check the status so a booking confirmed since the read is left alone. Once
+            # cancelled, make_payment refuses the booking and verify_payment won't confirm it.
+            count = Booking.objects.filter(id__in=ids, status="PENDING").update(status="CANCELLED")
+        self.max_lock = max(self.max_lock, time.perf_counter() - lock_start)
+        return count
+
+    def archive_batch(self, ids):
+        lock_start = time.perf_counter()
+        with transaction.atomic():
+            rows = Booking.objects.filter(id__in=ids, status="CANCELLED").values(
+                "id", "user_id", "package_id", "travelers", "total_amount",
+                "offer_code", "status", "booking_time", "payment__razorpay_order_id",
+                "payment__razorpay_payment_id", "payment__amount", "payment__paid", "payment__paid_at",
+            )
+            archived = [
+                ArchivedBooking(
+                    booking_id=row["id"],
+                    user_id=row["user_id"],
+                    package_id=row["package_id"],
+                    travelers=row["travelers"],
+                    total_amount=row["total_amount"],
+                    offer_code=row["offer_code"],
+                    status=row["status"],
+                    booking_time=row["booking_time"],
+                    razorpay_order_id=row["payment__razorpay_order_id"],
+                    razorpay_payment_id=row["payment__razorpay_payment_id"],
+                    payment_amount=row["payment__amount"],
+                    paid=bool(row["payment__paid"]),
+                    paid_at=row["payment__paid_at"],
+                )
+                for row in rows
+            ]
+            ArchivedBooking.objects.bulk_create(archived, ignore_conflicts=True)
+            # Cascades to the Payment rows, whose columns were copied into the archive above.
+            Booking.objects.filter(id__in=[a.booking_id for a in archived], status="CANCELLED").delete()
+        self.max_lock = max(self.max_lock, time.perf_counter() - lock_start)
+        return len(archived)
+
+    def report(self, label, result):
+        count, elapsed = result
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(f"{label}: {count} bookings in {elapsed:.2f}s ({rate:.0f} rows/s)")
@@ -0,0 +1,130 @@
+import asyncio
+import datetime
+import resource
+import statistics
+import time
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from booking import availability
+from booking.models import Destination, Package
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many availability streams open against the ASGI app in this process and "
+        "measure how long a seat change takes to reach every one of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=10000)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--coalesce", type=float, default=0,
+                            help="AVAILABILITY_COALESCE_SECONDS for the run (adds directly to latency).")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Only "default" gets a test database, so keep catalogue reads off the replicas.
+            with override_settings(AVAILABILITY_COALESCE_SECONDS=options["coalesce"], ALLOWED_HOSTS=["*"],
+                                   DATABASE_REPLICAS=[], AVAILABILITY_STREAM_ENABLED=True):
+                package = self.create_package()
+                asyncio.run(self.run(package, options["connections"], options["rounds"]))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def create_package(self):
+        destination = Destination.objects.create(name="Load test", slug="load-test")
+        today = datetime.date.today()
+        return Package.objects.create(
+            destination=destination, title="Load test package", slug="load-test-package",
+            short_description="", description="", price=1000, total_slots=100000,
+            available_slots=100000, start_date=today, end_date=today,
+        )
+
+    async def run(self, package, count, rounds):
+        app = get_asgi_application()
+        path = f"/package/{package.id}/availability/"
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        clients = [StreamClient(app, path) for _ in range(count)]
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(client.connect()) for client in clients]
+        await self.wait_for(clients, package.available_slots, timeout=600)
+        connect_s = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(
+            f"{count} streams open in {connect_s:.1f}s, "
+            f"~{(rss_after - rss_before) / max(count, 1):.1f} KiB peak RSS per stream"
+        )
+
+        slots = package.available_slots
+        for round_no in range(1, rounds + 1):
+            slots -= 1
+            await Package.objects.filter(id=package.id).aupdate(available_slots=slots)
+            sent_at = time.perf_counter()
+            availability.notify(package.id)
+            await self.wait_for(clients, slots, timeout=60)
+            latencies = sorted((client.received_at[slots] - sent_at) * 1000 for client in clients)
+            self.stdout.write(
+                f"round {round_no}: p50 {statistics.median(latencies):7.1f} ms  "
+                f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:7.1f} ms  "
+                f"all {latencies[-1]:7.1f} ms"
+            )
+
+        for client in clients:
+            client.disconnect()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def wait_for(self, clients, slots, timeout):
+        deadline = time.perf_counter() + timeout
+        while any(slots not in client.received_at for client in clients):
+            if time.perf_counter() > deadline:
+                missing = sum(1 for client in clients if slots not in client.received_at)
+                raise CommandError(f"{missing} streams never received available_slots={slots}")
+            await asyncio.sleep(0.005)
+
+
+class StreamClient:
+    """Minimal ASGI HTTP client that keeps one SSE response open and records when each value arrives."""
+
+    def __init__(self, app, path):
+        self.app = app
+        self.path = path
+        self.received_at = {}
+        self.closed = asyncio.Event()
+        self.requested = False
+
+    async def connect(self):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": self.path, "raw_path": self.path.encode(),
+            "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+        }
+        await self.app(scope, self.receive, self.send)
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.closed.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise CommandError(f"stream returned {message['status']}")
+        if message["type"] == "http.response.body":
+            now = time.perf_counter()
+            for line in message.get("body", b"").decode().splitlines():
+                if line.startswith("data: "):
+                    self.received_at.setdefault(int(line.rsplit(":", 1)[1].strip(" }")), now)
+
+    def disconnect(self):
+        self.closed.set()
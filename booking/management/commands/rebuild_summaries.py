@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking import summaries
+from booking.models import BookingSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's BookingSummary from confirmed bookings in one grouped query. "
+        "Run it on a schedule so trips move from upcoming to taken, or with --check to "
+        "verify the incremental totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Report summaries that differ from a fresh computation without writing.")
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            count = summaries.rebuild()
+            self.stdout.write(f"Rebuilt {count} booking summaries.")
+            return
+
+        fields = ("trips_taken", "upcoming_trips", "amount_spent")
+        expected = {s.user_id: s for s in summaries.compute_all()}
+        stored = {s.user_id: s for s in BookingSummary.objects.all()}
+        mismatches = []
+        for user_id in expected.keys() | stored.keys():
+            want = [getattr(expected.get(user_id, BookingSummary()), f) for f in fields]
+            have = [getattr(stored.get(user_id, BookingSummary()), f) for f in fields]
+            if want != have:
+                mismatches.append(f"user {user_id}: stored {have}, expected {want}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} summaries out of date:\n  " + "\n  ".join(mismatches))
+        self.stdout.write(self.style.SUCCESS(f"All {len(expected)} booking summaries are consistent."))
@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Replication stand-in for local development: copy the primary SQLite "
+        "database onto every SQLite replica in DATABASE_REPLICAS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Keep syncing every N seconds instead of once.")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas only copies SQLite databases; use native replication for PostgreSQL.")
+        replicas = [
+            settings.DATABASES[alias]["NAME"]
+            for alias in getattr(settings, "DATABASE_REPLICAS", [])
+            if settings.DATABASES[alias]["ENGINE"] == "django.db.backends.sqlite3"
+        ]
+        if not replicas:
+            self.stdout.write("No SQLite replicas configured.")
+            return
+        while True:
+            start = time.perf_counter()
+            self.sync(primary["NAME"], replicas)
+            self.stdout.write(f"Synced {len(replicas)} replica(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def sync(self, source_path, replica_paths):
+        source = sqlite3.connect(str(source_path))
+        try:
+            for path in replica_paths:
+                target = sqlite3.connect(str(path))
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_booking_offer_code'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.BigIntegerField(unique=True)),
+                ('user_id', models.IntegerField()),
+                ('package_id', models.BigIntegerField()),
+                ('travelers', models.PositiveIntegerField()),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('offer_code', models.CharField(blank=True, max_length=50, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('booking_time', models.DateTimeField()),
+                ('razorpay_order_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'booking_time'], name='booking_boo_status_a8a766_idx'),
+        ),
+    ]
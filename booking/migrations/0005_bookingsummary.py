@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('booking', '0004_archivedbooking_booking_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='booking_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('trips_taken', models.IntegerField(default=0)),
+                ('upcoming_trips', models.IntegerField(default=0)),
+                ('amount_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_bookingsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='paid',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='paid_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='payment_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='razorpay_payment_id',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+    ]
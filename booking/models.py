@@ -13,6 +13,19 @@ class Destination(models.Model):
         return self.name
 
 
+# Columns a listing card needs; skips the large ``description`` TextField.
+PACKAGE_CARD_FIELDS = (
+    "id", "slug", "title", "short_description", "price",
+    "available_slots", "cover_image",
+)
+
+
+class PackageQuerySet(models.QuerySet):
+    def cards(self):
+        """Plain dicts for listing pages, without building full Package instances."""
+        return self.values(*PACKAGE_CARD_FIELDS)
+
+
 class Package(models.Model):
     destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name="packages")
     title = models.CharField(max_length=200)
@@ -28,6 +41,8 @@ class Package(models.Model):
     cover_image = models.ImageField(upload_to="packages/", blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PackageQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -68,10 +83,35 @@ class Booking(models.Model):
     qr_code = models.CharField(max_length=255, null=True, blank=True)
     ticket_pdf = models.CharField(max_length=255, null=True, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["status", "booking_time"])]
+
     def __str__(self):
         return f"Booking #{self.id} - {self.user.username} - {self.package.title}"
 
 
+class ArchivedBooking(models.Model):
+    """Cold copy of an old cancelled booking, moved out of the bookings table by expire_bookings."""
+    booking_id = models.BigIntegerField(unique=True)
+    user_id = models.IntegerField()
+    package_id = models.BigIntegerField()
+    travelers = models.PositiveIntegerField()
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    offer_code = models.CharField(max_length=50, blank=True, null=True)
+    status = models.CharField(max_length=20)
+    booking_time = models.DateTimeField()
+    razorpay_order_id = models.CharField(max_length=200, blank=True, null=True)
+    # Copied from the booking's Payment, which is deleted with it.
+    razorpay_payment_id = models.CharField(max_length=200, blank=True, null=True)
+    payment_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    paid = models.BooleanField(default=False)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived booking #{self.booking_id}"
+
+
 class Payment(models.Model):
     booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name="payment")
     razorpay_order_id = models.CharField(max_length=200, blank=True, null=True)
@@ -83,3 +123,15 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment for booking {self.booking.id} - Paid: {self.paid}"
+
+
+class BookingSummary(models.Model):
+    """Per-user dashboard totals, kept current by booking.summaries and rebuilt by rebuild_summaries."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="booking_summary")
+    trips_taken = models.IntegerField(default=0)
+    upcoming_trips = models.IntegerField(default=0)
+    amount_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary for {self.user.username}"
@@ -0,0 +1,16 @@
+from django.conf import settings
+
+
+def get_client():
+    # razorpay pulls in requests/urllib3; import it only when a payment view needs it.
+    import razorpay
+    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+
+def create_order(booking, amount_paise):
+    return get_client().order.create({
+        "amount": amount_paise,
+        "currency": "INR",
+        "receipt": f"booking_{booking.id}",
+        "payment_capture": 1,
+    })
@@ -0,0 +1,23 @@
+# Runs inside the ticket PDF worker processes. Keep this module free of Django
+# imports so spawning a worker only pays for xhtml2pdf.
+import logging
+from io import BytesIO
+
+from xhtml2pdf import pisa
+
+WARM_UP_HTML = "<html><body><p>warm up</p></body></html>"
+
+
+def warm_up():
+    # Spawned workers don't inherit Django's LOGGING; keep xhtml2pdf's per-CSS-rule warnings off stderr.
+    logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+    # The first CreatePDF call loads fonts and reportlab internals; pay for it at start-up.
+    render(WARM_UP_HTML)
+
+
+def render(html):
+    result = BytesIO()
+    pdf = pisa.CreatePDF(html, dest=result)
+    if pdf.err:
+        return None
+    return result.getvalue()
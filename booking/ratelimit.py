@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+# ----------------------------
+# RATES
+# ----------------------------
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class Rate:
+    """A limit of ``limit`` hits per ``period`` seconds, parsed from "10/m"."""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+
+    @classmethod
+    def parse(cls, value):
+        limit, _, unit = value.partition("/")
+        return cls(int(limit), PERIODS[unit[:1] or "s"])
+
+    def __str__(self):
+        return f"{self.limit}/{self.period}s"
+
+
+# ----------------------------
+# BACKENDS
+# ----------------------------
+class MemoryBackend:
+    """Token buckets held in this process; fastest, but every worker counts alone."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, rate):
+        now = time.monotonic()
+        refill = rate.limit / rate.period
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (rate.limit, now))
+            tokens = min(rate.limit, tokens + (now - stamp) * refill)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / refill
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after == 0, retry_after
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBackend:
+    """Sliding-window counters in a Django cache, shared by every worker using it.
+
+    Give it a cache alias of its own: ``reset()`` clears the whole alias. The
+    cache must not evict live keys and should increment atomically; on one host
+    use ``booking.cache.CounterFileCache``.
+    """
+
+    def __init__(self, alias="ratelimit"):
+        self.cache = caches[alias]
+
+    def hit(self, key, rate):
+        now = time.time()
+        window = int(now // rate.period)
+        current_key = f"rl:{key}:{window}"
+        previous_key = f"rl:{key}:{window - 1}"
+        counts = self.cache.get_many([current_key, previous_key])
+        elapsed = (now % rate.period) / rate.period
+        estimate = counts.get(previous_key, 0) * (1 - elapsed) + counts.get(current_key, 0)
+        if estimate >= rate.limit:
+            return False, rate.period * (1 - elapsed)
+        if not self.cache.add(current_key, 1, timeout=rate.period * 2):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                # Expired between add() and incr(); add() again rather than set(),
+                # which could overwrite another worker's fresh count.
+                self.cache.add(current_key, 1, timeout=rate.period * 2)
+        return True, 0
+
+    def reset(self):
+        self.cache.clear()
+
+
+_backends = {}
+
+
+def get_backend():
+    name = getattr(settings, "RATELIMIT_BACKEND", "memory")
+    alias = getattr(settings, "RATELIMIT_CACHE_ALIAS", "ratelimit")
+    key = (name, alias) if name == "cache" else name
+    if key not in _backends:
+        _backends[key] = CacheBackend(alias) if name == "cache" else MemoryBackend()
+    return _backends[key]
+
+
+# ----------------------------
+# KEYS
+# ----------------------------
+def client_ip(request):
+    meta_key = getattr(settings, "RATELIMIT_IP_META_KEY", "REMOTE_ADDR")
+    value = request.META.get(meta_key) or request.META.get("REMOTE_ADDR", "")
+    # Clients can prepend anything to X-Forwarded-For; only the entries appended by
+    # our own RATELIMIT_PROXY_COUNT proxies (counted from the right) can be trusted.
+    hops = [hop.strip() for hop in value.split(",") if hop.strip()]
+    if not hops:
+        return ""
+    return hops[-min(getattr(settings, "RATELIMIT_PROXY_COUNT", 1), len(hops))]
+
+
+def request_key(request, kind):
+    # "ip" never touches the database; "user" resolves the session, so list it after "ip".
+    # The kind is part of the key so an anonymous "user" policy gets its own bucket
+    # instead of sharing the "ip" policy's bucket at a different rate.
+    if kind == "user":
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+    return f"{kind}:ip:{client_ip(request)}"
+
+
+# ----------------------------
+# DECORATOR
+# ----------------------------
+def check(request, name):
+    """Return the number of seconds to wait, or 0 when every policy for ``name`` allows the request."""
+    if not getattr(settings, "RATELIMIT_ENABLED", True):
+        return 0
+    backend = get_backend()
+    for kind, rate in getattr(settings, "RATELIMIT_POLICIES", {}).get(name, []):
+        allowed, retry_after = backend.hit(f"{name}:{request_key(request, kind)}", Rate.parse(rate))
+        if not allowed:
+            return retry_after
+    return 0
+
+
+def ratelimit(name, methods=None):
+    """Reject requests over the ``RATELIMIT_POLICIES[name]`` limits with a 429 before the view runs."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check(request, name)
+                if retry_after:
+                    response = HttpResponse("Too many requests. Please try again shortly.", status=429)
+                    response["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+                    return response
+            return view_func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,87 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Catalogue models are read-mostly and safe to serve from a replica. Everything
+# else (bookings, payments, auth, sessions) always uses the primary.
+REPLICA_MODELS = {"destination", "package", "packageimage", "offer"}
+
+_pinned = ContextVar("replica_pinned", default=False)
+_wrote = ContextVar("primary_written", default=False)
+
+
+class PrimaryReplicaRouter:
+    """Send catalogue reads to ``DATABASE_REPLICAS`` and everything else to ``default``.
+
+    Any write pins the rest of the current request to the primary, and
+    ``ReplicaPinMiddleware`` carries that pin over to the next few requests
+    so the user reads their own writes after a redirect.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas or _pinned.get():
+            return "default"
+        if model._meta.app_label == "booking" and model._meta.model_name in REPLICA_MODELS:
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *getattr(settings, "DATABASE_REPLICAS", [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self.start(request)
+        try:
+            return self.finish(self.get_response(request))
+        finally:
+            self.reset(tokens)
+
+    async def __acall__(self, request):
+        tokens = self.start(request)
+        try:
+            return self.finish(await self.get_response(request))
+        finally:
+            self.reset(tokens)
+
+    def start(self, request):
+        cookie = getattr(settings, "REPLICA_PIN_COOKIE", "primary_pin")
+        return _pinned.set(cookie in request.COOKIES), _wrote.set(False)
+
+    def finish(self, response):
+        if _wrote.get():
+            response.set_cookie(
+                getattr(settings, "REPLICA_PIN_COOKIE", "primary_pin"), "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True, samesite="Lax",
+            )
+        return response
+
+    def reset(self, tokens):
+        pinned_token, wrote_token = tokens
+        _pinned.reset(pinned_token)
+        _wrote.reset(wrote_token)
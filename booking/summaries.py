@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from booking.models import Booking, BookingSummary
+
+
+def get_summary(user):
+    """O(1) primary-key lookup; users with no confirmed bookings get an unsaved, all-zero summary."""
+    return BookingSummary.objects.filter(user_id=user.pk).first() or BookingSummary(user=user)
+
+
+def _bucket(booking):
+    # Trips move from upcoming to taken as dates pass; the scheduled rebuild catches those up.
+    return "upcoming_trips" if booking.package.end_date >= timezone.localdate() else "trips_taken"
+
+
+def record_confirmed(booking):
+    """Add a booking that has just become CONFIRMED to its user's summary.
+
+    Nothing in the app cancels a confirmed booking; admin edits of that kind are
+    picked up by the scheduled rebuild.
+    """
+    bucket = _bucket(booking)
+    changes = {
+        bucket: F(bucket) + 1,
+        "amount_spent": F("amount_spent") + booking.total_amount,
+        "updated_at": timezone.now(),
+    }
+    with transaction.atomic():
+        # No row matched: the user has no summary yet, or a concurrent rebuild()
+        # deleted it (on PostgreSQL this UPDATE waits for the rebuild, then matches
+        # nothing). A new statement sees the rebuilt row, or creates one.
+        if not BookingSummary.objects.filter(user_id=booking.user_id).update(**changes):
+            BookingSummary.objects.get_or_create(user_id=booking.user_id)
+            BookingSummary.objects.filter(user_id=booking.user_id).update(**changes)
+
+
+def compute_all():
+    """One grouped query over every confirmed booking; returns unsaved BookingSummary rows."""
+    today = timezone.localdate()
+    rows = (
+        Booking.objects.filter(status="CONFIRMED")
+        .values("user_id")
+        .annotate(
+            trips_taken=Count("id", filter=Q(package__end_date__lt=today)),
+            upcoming_trips=Count("id", filter=Q(package__end_date__gte=today)),
+            amount_spent=Sum("total_amount"),
+        )
+        .order_by()
+    )
+    return [BookingSummary(**row) for row in rows]
+
+
+def rebuild(batch_size=1000):
+    with transaction.atomic():
+        # Delete first: on SQLite this takes the database write lock, so no
+        # record_confirmed() can land between the read and the insert. Elsewhere
+        # only the deleted rows are locked; record_confirmed() copes with its
+        # row disappearing under it.
+        BookingSummary.objects.all().delete()
+        summaries = compute_all()
+        BookingSummary.objects.bulk_create(summaries, batch_size=batch_size)
+    return len(summaries)
@@ -1,3 +1,619 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.utils import timezone
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from booking import availability, ratelimit, routers, summaries, tickets
+from booking.models import ArchivedBooking, Booking, BookingSummary, Destination, Package, Payment
+
+# Loading the WSGI app and the URLconf (which imports booking.views) is what
+# every worker does before serving its first catalogue page.
+STARTUP_SCRIPT = """
+import json, resource, sys
+import triptrek.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+try:
+    # ru_maxrss is carried over from the parent across fork/exec; VmHWM is this process's own peak.
+    with open("/proc/self/status") as status:
+        max_rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"modules": sorted(sys.modules), "max_rss_kb": max_rss_kb}))
+"""
+
+# Set just above the lazy-import startup (~320 ms, ~45 MB); importing razorpay,
+# qrcode and xhtml2pdf eagerly again costs ~1 s and ~107 MB and must fail these.
+IMPORT_TIME_BUDGET_MS = 600
+RSS_BUDGET_MB = 70
+LAZY_MODULES = ["razorpay", "qrcode", "xhtml2pdf", "reportlab", "PIL", "requests"]
+
+
+class StartupProfileTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "triptrek.settings"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        cls.profile = json.loads(result.stdout)
+        cls.import_ms = sum(
+            int(line.split("|")[1]) / 1000
+            for line in result.stderr.splitlines()
+            # Top-level imports have no indentation before the module name.
+            if line.startswith("import time:") and not line.split("|")[2].startswith("  ")
+            and line.split("|")[1].strip().isdigit()
+        )
+
+    def test_heavy_dependencies_are_not_imported_at_startup(self):
+        loaded = [name for name in LAZY_MODULES if name in self.profile["modules"]]
+        self.assertEqual(loaded, [])
+
+    def test_import_time_budget(self):
+        self.assertLess(self.import_ms, IMPORT_TIME_BUDGET_MS)
+
+    def test_rss_budget(self):
+        self.assertLess(self.profile["max_rss_kb"] / 1024, RSS_BUDGET_MB)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+class RateLimitBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("booking.ratelimit.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_bucket_allows_burst_then_refills(self):
+        backend = ratelimit.MemoryBackend()
+        rate = ratelimit.Rate.parse("3/m")
+        self.assertEqual([backend.hit("k", rate)[0] for _ in range(4)], [True, True, True, False])
+        # One token refills every 20 seconds.
+        self.assertAlmostEqual(backend.hit("k", rate)[1], 20)
+        self.clock.now += 20
+        self.assertTrue(backend.hit("k", rate)[0])
+        self.assertFalse(backend.hit("k", rate)[0])
+
+    def test_token_bucket_evicts_oldest_key(self):
+        backend = ratelimit.MemoryBackend(max_keys=2)
+        rate = ratelimit.Rate.parse("1/m")
+        for key in ("a", "b", "c"):
+            backend.hit(key, rate)
+        self.assertEqual(list(backend._buckets), ["b", "c"])
+
+    @override_settings(CACHES={"rl-test": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_sliding_window_weights_previous_window(self):
+        backend = ratelimit.CacheBackend("rl-test")
+        rate = ratelimit.Rate.parse("4/m")
+        self.clock.now = 60 * 100
+        self.assertEqual([backend.hit("k", rate)[0] for _ in range(5)], [True] * 4 + [False])
+        # Halfway through the next window the previous count weighs 4 * 0.5 = 2.
+        self.clock.now += 90
+        self.assertTrue(backend.hit("k", rate)[0])
+        self.assertTrue(backend.hit("k", rate)[0])
+        allowed, retry_after = backend.hit("k", rate)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 30)
+
+
+class CounterFileCacheTests(SimpleTestCase):
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        override = self.settings(CACHES={"rl-file": {
+            "BACKEND": "booking.cache.CounterFileCache",
+            "LOCATION": location.name,
+            "OPTIONS": {"MAX_ENTRIES": 20},
+        }})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_full_cache_keeps_existing_bucket(self):
+        backend = ratelimit.CacheBackend("rl-file")
+        rate = ratelimit.Rate.parse("10/h")
+        for _ in range(10):
+            backend.hit("login:ip:10.0.0.1", rate)
+        self.assertFalse(backend.hit("login:ip:10.0.0.1", rate)[0])
+        # Counters left behind by earlier windows fill the cache past MAX_ENTRIES...
+        for n in range(30):
+            backend.cache.set(f"rl:stale:{n}", 1, timeout=-1)
+        # ...and new clients arriving must cull those, not the live bucket.
+        for n in range(15):
+            backend.hit(f"login:ip:10.0.1.{n}", rate)
+        self.assertFalse(backend.hit("login:ip:10.0.0.1", rate)[0])
+        self.assertLessEqual(len(backend.cache._list_cache_files()), 20)
+
+    def test_concurrent_increments_are_not_lost(self):
+        cache = ratelimit.caches["rl-file"]
+        cache.add("hits", 0, timeout=60)
+
+        def worker():
+            for _ in range(50):
+                cache.incr("hits")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get("hits"), 400)
+
+    def test_add_only_creates_missing_or_expired_keys(self):
+        cache = ratelimit.caches["rl-file"]
+        self.assertTrue(cache.add("k", 1, timeout=60))
+        self.assertFalse(cache.add("k", 5, timeout=60))
+        self.assertEqual(cache.incr("k"), 2)
+        cache.set("k", 9, timeout=-1)
+        self.assertIsNone(cache.get("k"))
+        with self.assertRaises(ValueError):
+            cache.incr("k")
+        self.assertTrue(cache.add("k", 1, timeout=60))
+
+
+@override_settings(
+    RATELIMIT_ENABLED=True,
+    RATELIMIT_BACKEND="memory",
+    RATELIMIT_POLICIES={"test": [("ip", "2/m")]},
+)
+class RateLimitDecoratorTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit.get_backend().reset()
+        self.addCleanup(ratelimit.get_backend().reset)
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        return HttpResponse("ok")
+
+    def test_rejects_with_429_and_retry_after(self):
+        view = ratelimit.ratelimit("test")(self.view)
+        statuses = [view(self.factory.get("/", REMOTE_ADDR="10.0.0.1")).status_code for _ in range(2)]
+        response = view(self.factory.get("/", REMOTE_ADDR="10.0.0.1"))
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(view(self.factory.get("/", REMOTE_ADDR="10.0.0.2")).status_code, 200)
+
+    def test_methods_filter(self):
+        view = ratelimit.ratelimit("test", methods=("POST",))(self.view)
+        for _ in range(5):
+            self.assertEqual(view(self.factory.get("/", REMOTE_ADDR="10.0.0.1")).status_code, 200)
+
+    def test_anonymous_user_policy_has_its_own_bucket(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1")
+        request.user = AnonymousUser()
+        self.assertNotEqual(ratelimit.request_key(request, "ip"), ratelimit.request_key(request, "user"))
+
+    @override_settings(RATELIMIT_IP_META_KEY="HTTP_X_FORWARDED_FOR", RATELIMIT_PROXY_COUNT=1)
+    def test_spoofed_forwarded_for_entries_are_ignored(self):
+        view = ratelimit.ratelimit("test")(self.view)
+        statuses = [
+            view(self.factory.get("/", HTTP_X_FORWARDED_FOR=f"1.2.3.{i}, 203.0.113.9")).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRoutingTests(TransactionTestCase):
+    # "replica1" mirrors the default test database over its own connection, so rows
+    # must be committed (not held in a TestCase transaction) for the replica to see them.
+    databases = {"default", "replica1"}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        # Writes made outside any request (e.g. test database setup) pin this context.
+        token = routers._pinned.set(False)
+        self.addCleanup(routers._pinned.reset, token)
+
+    def test_catalogue_reads_use_replica(self):
+        self.assertEqual(Package.objects.all().db, "replica1")
+        self.assertEqual(Destination.objects.all().db, "replica1")
+        self.assertEqual(Booking.objects.all().db, "default")
+
+    def test_no_replicas_configured_uses_primary(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(Package.objects.all().db, "default")
+
+    def test_write_pins_rest_of_request_and_sets_cookie(self):
+        seen = []
+
+        def view(request):
+            seen.append(Package.objects.all().db)
+            Destination.objects.create(name="Goa", slug="goa")
+            seen.append(Package.objects.all().db)
+            return HttpResponse("ok")
+
+        response = routers.ReplicaPinMiddleware(view)(self.factory.get("/"))
+        self.assertEqual(seen, ["replica1", "default"])
+        self.assertIn("primary_pin", response.cookies)
+        # The pin does not leak past the request.
+        self.assertEqual(Package.objects.all().db, "replica1")
+
+    def test_pin_cookie_routes_reads_to_primary(self):
+        seen = []
+
+        def view(request):
+            seen.append(Package.objects.all().db)
+            return HttpResponse("ok")
+
+        request = self.factory.get("/")
+        request.COOKIES["primary_pin"] = "1"
+        response = routers.ReplicaPinMiddleware(view)(request)
+        self.assertEqual(seen, ["default"])
+        self.assertNotIn("primary_pin", response.cookies)
+
+    async def test_async_requests_stay_async(self):
+        seen = []
+
+        async def view(request):
+            seen.append(Package.objects.all().db)
+            await Destination.objects.acreate(name="Bali", slug="bali")
+            seen.append(Package.objects.all().db)
+            return HttpResponse("ok")
+
+        middleware = routers.ReplicaPinMiddleware(view)
+        response = await middleware(AsyncRequestFactory().get("/"))
+        self.assertEqual(seen, ["replica1", "default"])
+        self.assertIn("primary_pin", response.cookies)
+
+    def test_catalogue_page_renders_from_replica(self):
+        Destination.objects.create(name="Goa", slug="goa")
+        response = self.client.get("/destinations/")
+        self.assertContains(response, "Goa")
+
+
+def make_package(slug="goa-escape", end_in_days=30, **kwargs):
+    destination, _ = Destination.objects.get_or_create(name="Goa", slug="goa")
+    today = datetime.date.today()
+    fields = dict(
+        destination=destination, title="Goa Escape", slug=slug, short_description="Beach",
+        description="Long description", price=1000, available_slots=20,
+        start_date=today + datetime.timedelta(days=end_in_days - 3),
+        end_date=today + datetime.timedelta(days=end_in_days),
+    )
+    fields.update(kwargs)
+    return Package.objects.create(**fields)
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class PackageCardListingTests(TestCase):
+    def setUp(self):
+        self.package = make_package(cover_image="packages/goa beach & sun.jpg")
+
+    def get_cards(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        package_selects = [
+            query["sql"].split(" FROM ")[0] for query in queries.captured_queries
+            if '"booking_package"."slug"' in query["sql"]
+        ]
+        self.assertEqual(len(package_selects), 1)
+        self.assertNotIn('"booking_package"."description"', package_selects[0])
+        return response
+
+    def test_holiday_packages_renders_cards(self):
+        response = self.get_cards("/holidays/")
+        self.assertContains(response, "Goa Escape")
+        self.assertContains(response, "Beach")
+        self.assertContains(response, "₹1000")
+        self.assertContains(response, f'href="/package/{self.package.slug}/"')
+        self.assertContains(response, 'src="/media/packages/goa%20beach%20%26%20sun.jpg"')
+
+    def test_destination_detail_renders_cards(self):
+        response = self.get_cards("/destination/goa/")
+        self.assertContains(response, f'<a href="/package/{self.package.slug}/">Goa Escape</a>', html=True)
+
+    def test_search_renders_cards(self):
+        response = self.get_cards("/search/?q=Escape")
+        self.assertContains(response, "Goa Escape")
+        self.assertContains(response, "₹ 1000")
+        self.assertContains(response, 'src="/media/packages/goa%20beach%20%26%20sun.jpg"')
+
+
+class ExpireBookingsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveller", "t@example.com", "pw")
+        self.package = make_package()
+
+    def booking(self, status, age):
+        booking = Booking.objects.create(user=self.user, package=self.package, total_amount=1000, status=status)
+        Booking.objects.filter(pk=booking.pk).update(booking_time=timezone.now() - age)
+        return booking
+
+    def test_cancels_stale_pending_only(self):
+        stale = self.booking("PENDING", datetime.timedelta(hours=2))
+        fresh = self.booking("PENDING", datetime.timedelta(minutes=1))
+        call_command("expire_bookings", "--pause", "0", "--no-archive", stdout=StringIO())
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, fresh.status), ("CANCELLED", "PENDING"))
+
+    def test_archive_keeps_payment_details(self):
+        old = self.booking("CANCELLED", datetime.timedelta(days=200))
+        paid_at = timezone.now() - datetime.timedelta(days=199)
+        Payment.objects.create(booking=old, amount=1000, razorpay_order_id="order_1",
+                               razorpay_payment_id="pay_1", paid=True, paid_at=paid_at)
+        call_command("expire_bookings", "--pause", "0", stdout=StringIO())
+
+        self.assertFalse(Booking.objects.filter(pk=old.pk).exists())
+        archived = ArchivedBooking.objects.get(booking_id=old.pk)
+        self.assertEqual(
+            (archived.razorpay_order_id, archived.razorpay_payment_id, archived.payment_amount, archived.paid),
+            ("order_1", "pay_1", 1000, True),
+        )
+        self.assertEqual(archived.paid_at, paid_at)
+
+
+def signature(order_id, payment_id):
+    return hmac.new(
+        bytes(settings.RAZORPAY_KEY_SECRET, "utf-8"),
+        msg=bytes(order_id + "|" + payment_id, "utf-8"),
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+
+
+class VerifyPaymentMixin:
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name, RATELIMIT_ENABLED=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user("traveller", "t@example.com", "pw")
+        self.package = make_package()
+        self.client.force_login(self.user)
+
+    def pending_booking(self, order_id="order_1"):
+        booking = Booking.objects.create(user=self.user, package=self.package, total_amount=2000, travelers=2)
+        Payment.objects.create(booking=booking, amount=2000, razorpay_order_id=order_id)
+        return booking
+
+    def verify(self, booking, order_id="order_1", payment_id="pay_1"):
+        return self.client.post("/payment/verify/", json.dumps({
+            "booking_id": booking.id,
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": signature(order_id, payment_id),
+        }), content_type="application/json")
+
+
+class VerifyPaymentTicketTests(VerifyPaymentMixin, TestCase):
+    def test_busy_renderer_still_confirms_and_emails(self):
+        booking = self.pending_booking()
+        with mock.patch("booking.tickets.render_pdf", side_effect=tickets.PdfRenderBusy):
+            response = self.verify(booking)
+        self.assertEqual(response.json(), {"status": "success"})
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, "CONFIRMED")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].attachments, [])
+        self.assertIn("download your ticket", mail.outbox[0].body)
+
+
+@override_settings(TICKET_PDF_WORKERS=1)
+@override_settings(TICKET_PDF_WORKERS=0)
+class CancelledWhilePayingTests(VerifyPaymentMixin, TestCase):
+    def expire(self, booking):
+        Booking.objects.filter(pk=booking.pk).update(booking_time=timezone.now() - datetime.timedelta(hours=2))
+        call_command("expire_bookings", "--pause", "0", "--no-archive", stdout=StringIO())
+
+    def test_payment_completed_after_expiry_is_not_confirmed(self):
+        booking = self.pending_booking()
+        self.expire(booking)
+        response = self.verify(booking)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["status"], "failure")
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, "CANCELLED")
+        self.package.refresh_from_db()
+        self.assertEqual(self.package.available_slots, 20)
+        self.assertFalse(BookingSummary.objects.filter(user=self.user).exists())
+        self.assertEqual(mail.outbox, [])
+        # The capture is kept on the payment so it can be refunded.
+        payment = Payment.objects.get(booking=booking)
+        self.assertEqual((payment.paid, payment.razorpay_payment_id), (True, "pay_1"))
+
+    def test_make_payment_refuses_cancelled_booking(self):
+        booking = self.pending_booking()
+        self.expire(booking)
+        with mock.patch("booking.payments.create_order") as create_order:
+            response = self.client.get(f"/make-payment/{booking.id}/")
+        self.assertEqual(response.status_code, 409)
+        create_order.assert_not_called()
+
+
+class PdfPoolRecyclingTests(SimpleTestCase):
+    HTML = "<html><body><p>ticket</p></body></html>"
+
+    def setUp(self):
+        self.addCleanup(tickets.shutdown)
+
+    def test_timeout_recycles_pool(self):
+        tickets.warm_up()
+        pool = tickets.get_pool()
+        with self.settings(TICKET_PDF_TIMEOUT=0.001), self.assertRaises(tickets.PdfRenderTimeout):
+            tickets.render_pdf(self.HTML * 200)
+        self.assertIsNot(tickets.get_pool(), pool)
+        self.assertTrue(tickets.render_pdf(self.HTML).startswith(b"%PDF"))
+
+    def test_dead_worker_recycles_pool(self):
+        tickets.warm_up()
+        pool = tickets.get_pool()
+        for process in pool._processes.values():
+            process.kill()
+            process.join()
+        with self.assertRaises(tickets.PdfRenderError):
+            tickets.render_pdf(self.HTML)
+        self.assertTrue(tickets.render_pdf(self.HTML).startswith(b"%PDF"))
+
+    @override_settings(TICKET_PDF_WORKERS=1, TICKET_PDF_QUEUE_SIZE=1, TICKET_PDF_QUEUE_WAIT=0.01)
+    def test_batch_larger_than_queue_waits_for_its_own_renders(self):
+        # Each document takes longer to render than TICKET_PDF_QUEUE_WAIT.
+        slow = "<html><body>" + "<p>ticket line</p>" * 200 + "</body></html>"
+        tickets.warm_up()
+        pdfs = tickets.render_many([slow] * 6)
+        self.assertEqual(len(pdfs), 6)
+        self.assertTrue(all(pdf.startswith(b"%PDF") for pdf in pdfs))
+
+
+@override_settings(TICKET_PDF_WORKERS=0)
+class BookingSummaryTests(VerifyPaymentMixin, TestCase):
+    def test_verify_payment_increments_once(self):
+        booking = self.pending_booking()
+        self.verify(booking)
+        self.verify(booking)
+        summary = summaries.get_summary(self.user)
+        self.assertEqual((summary.upcoming_trips, summary.trips_taken, summary.amount_spent), (1, 0, 2000))
+
+    def test_concurrent_confirmation_counts_once(self):
+        booking = self.pending_booking()
+        # A second request that loaded the booking while it was still PENDING.
+        stale = Booking.objects.get(pk=booking.pk)
+        self.verify(booking)
+        with mock.patch("booking.views.get_object_or_404", return_value=stale):
+            self.verify(booking)
+        self.assertEqual(summaries.get_summary(self.user).upcoming_trips, 1)
+
+    def test_increment_recreates_row_removed_by_rebuild(self):
+        booking = Booking.objects.create(user=self.user, package=self.package, total_amount=700, status="CONFIRMED")
+        summaries.record_confirmed(booking)
+        # As a concurrent rebuild() that has not yet re-inserted this user's row.
+        BookingSummary.objects.all().delete()
+        summaries.record_confirmed(booking)
+        summary = BookingSummary.objects.get(user=self.user)
+        self.assertEqual((summary.upcoming_trips, summary.amount_spent), (1, 700))
+
+    def test_user_without_bookings_gets_zero_summary(self):
+        summary = summaries.get_summary(self.user)
+        self.assertFalse(BookingSummary.objects.filter(user=self.user).exists())
+        self.assertEqual((summary.trips_taken, summary.upcoming_trips, summary.amount_spent), (0, 0, 0))
+
+    def test_rebuild_and_check(self):
+        past = make_package(slug="past-trip", end_in_days=-10)
+        Booking.objects.create(user=self.user, package=past, total_amount=500, status="CONFIRMED")
+        Booking.objects.create(user=self.user, package=self.package, total_amount=700, status="CONFIRMED")
+        Booking.objects.create(user=self.user, package=self.package, total_amount=900, status="CANCELLED")
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_summaries", "--check", stdout=StringIO())
+        call_command("rebuild_summaries", stdout=StringIO())
+        summary = BookingSummary.objects.get(user=self.user)
+        self.assertEqual((summary.trips_taken, summary.upcoming_trips, summary.amount_spent), (1, 1, 1200))
+        call_command("rebuild_summaries", "--check", stdout=StringIO())
+
+        BookingSummary.objects.filter(user=self.user).update(amount_spent=1)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_summaries", "--check", stdout=StringIO())
+
+
+@override_settings(TICKET_PDF_WORKERS=0)
+class AvailabilitySlotTests(VerifyPaymentMixin, TestCase):
+    def test_confirmation_takes_slots_once(self):
+        booking = self.pending_booking()
+        with mock.patch("booking.availability.notify") as notify:
+            self.verify(booking)
+            self.verify(booking)
+        self.package.refresh_from_db()
+        self.assertEqual(self.package.available_slots, 18)
+        notify.assert_called_with(self.package.id)
+
+
+@override_settings(AVAILABILITY_STREAM_ENABLED=True)
+class AvailabilityStreamTests(TestCase):
+    def setUp(self):
+        self.package = make_package()
+        self.url = f"/package/{self.package.id}/availability/"
+
+    def test_wsgi_handler_refuses_stream(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    async def test_asgi_handler_streams_current_slots(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = response.streaming_content
+        try:
+            self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+            self.assertIn(b'"available_slots": 20', await anext(chunks))
+        finally:
+            await chunks.aclose()
+            availability.get_hub().poller.cancel()
+
+    @override_settings(AVAILABILITY_STREAM_ENABLED=False)
+    async def test_asgi_handler_refuses_stream_when_disabled(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_page_only_subscribes_when_enabled(self):
+        detail = f"/package/{self.package.slug}/"
+        self.assertContains(self.client.get(detail), "EventSource")
+        with self.settings(AVAILABILITY_STREAM_ENABLED=False):
+            self.assertNotContains(self.client.get(detail), "EventSource")
+
+
+class AvailabilityHubTests(SimpleTestCase):
+    async def test_fresh_subscriber_read_replaces_stale_hub_value(self):
+        hub = availability.AvailabilityHub()
+        hub.poller = mock.Mock()  # keep the DB poller out of this test
+        hub.subscribe(1, 10)
+        changed = hub.changed[1]
+        # A second stream read 9 from the database before the poller noticed the booking.
+        hub.subscribe(1, 9)
+        self.assertEqual(hub.slots[1], 9)
+        self.assertTrue(changed.is_set())
+        hub.subscribe(1, 9)
+        self.assertFalse(hub.changed[1].is_set())
+
+    @override_settings(AVAILABILITY_POLL_SECONDS=0.01, AVAILABILITY_COALESCE_SECONDS=0)
+    async def test_poller_survives_failed_refresh(self):
+        hub = availability.AvailabilityHub()
+        calls = []
+
+        async def refresh():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+
+        hub.refresh = refresh
+        with self.assertLogs("booking.availability", "ERROR"):
+            hub.subscribe(1, 10)
+            for _ in range(200):
+                if len(calls) >= 3:
+                    break
+                await asyncio.sleep(0.01)
+        self.assertGreaterEqual(len(calls), 3)
+        self.assertIsNotNone(hub.poller)
+        hub.unsubscribe(1)
+        await asyncio.wait_for(hub.poller, 1)
@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+
+class PdfRenderError(Exception):
+    pass
+
+
+class PdfRenderBusy(PdfRenderError):
+    """The render queue is full; the caller should shed load and retry later."""
+
+
+class PdfRenderTimeout(PdfRenderError):
+    pass
+
+
+# ----------------------------
+# WORKER POOL
+# ----------------------------
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _current():
+    """Return the ``(pool, slots)`` pair, starting the warm pool on first use; ``(None, None)`` if disabled."""
+    global _pool, _slots
+    workers = getattr(settings, "TICKET_PDF_WORKERS", 2)
+    if not workers:
+        return None, None
+    with _pool_lock:
+        if _pool is None:
+            from booking import pdfworker
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=pdfworker.warm_up,
+            )
+            _slots = threading.BoundedSemaphore(workers + getattr(settings, "TICKET_PDF_QUEUE_SIZE", 8))
+        return _pool, _slots
+
+
+def get_pool():
+    """Start the warm worker pool on first use; returns None when TICKET_PDF_WORKERS is 0."""
+    return _current()[0]
+
+
+def warm_up():
+    """Start every worker now (e.g. from a server post-fork hook) instead of on the first ticket."""
+    pool = get_pool()
+    if pool is not None:
+        from booking import pdfworker
+        workers = getattr(settings, "TICKET_PDF_WORKERS", 2)
+        for future in [pool.submit(pdfworker.warm_up) for _ in range(workers)]:
+            future.result()
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _recycle(pool):
+    """Throw away a pool whose workers are hung or dead; the next render starts a fresh one.
+
+    The executor cannot say which worker holds a given future, so every worker
+    is killed: other requests' in-flight renders fail with ``PdfRenderError``
+    too. Callers already treat that as "no PDF" (the e-mail goes without the
+    attachment, downloads get a 503), which beats leaving a hung worker
+    holding queue slots until it finishes.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # A cancelled future cannot stop a render that is already running, so kill the
+    # workers outright. Their futures fail, which releases the old pool's queue slots.
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(pool, slots, html, wait):
+    from booking import pdfworker
+    if not slots.acquire(timeout=wait):
+        raise PdfRenderBusy("Ticket renderer is busy.")
+    try:
+        future = pool.submit(pdfworker.render, html)
+    except BrokenProcessPool:
+        slots.release()
+        raise
+    # The slot is freed when the render really finishes, not when a caller gives up waiting.
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def render_pdf(html):
+    """Render one HTML document to PDF bytes, or None if xhtml2pdf reports an error."""
+    return render_many([html])[0]
+
+
+def render_many(documents):
+    """Render several HTML documents in parallel; results keep the input order.
+
+    Raises ``PdfRenderBusy`` when the queue is full and ``PdfRenderTimeout`` when
+    renders overrun ``TICKET_PDF_TIMEOUT``; a timeout or a crashed worker recycles
+    the pool (``PdfRenderError``) so later renders get fresh workers.
+
+    Only the first document is shed after ``TICKET_PDF_QUEUE_WAIT``. Once a batch
+    has work queued, the rest of it waits for slots as its own renders finish, so
+    batches may be larger than the queue.
+    """
+    pool, slots = _current()
+    if pool is None:
+        from booking import pdfworker
+        return [pdfworker.render(html) for html in documents]
+
+    timeout = getattr(settings, "TICKET_PDF_TIMEOUT", 30)
+    futures = []
+    try:
+        for html in documents:
+            if not futures:
+                futures.append(_submit(pool, slots, html, getattr(settings, "TICKET_PDF_QUEUE_WAIT", 1)))
+                continue
+            try:
+                futures.append(_submit(pool, slots, html, timeout))
+            except PdfRenderBusy:
+                # Not one render finished in a whole timeout: the workers are hung.
+                _recycle(pool)
+                raise PdfRenderTimeout(f"Ticket rendering took longer than {timeout}s.") from None
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            _recycle(pool)
+            raise PdfRenderTimeout(f"Ticket rendering took longer than {timeout}s.")
+        return [future.result() for future in futures]
+    except PdfRenderBusy:
+        for future in futures:
+            future.cancel()
+        raise
+    except BrokenProcessPool as exc:
+        _recycle(pool)
+        raise PdfRenderError("A ticket rendering worker died.") from exc
+
+
+# ----------------------------
+# TICKETS
+# ----------------------------
+def generate_qr(booking):
+    """Write the booking's QR code under MEDIA_ROOT and return its media-relative path."""
+    # qrcode loads PIL; keep it out of worker start-up until a ticket is issued.
+    import qrcode
+    qr_dir = os.path.join(settings.MEDIA_ROOT, "qr")
+    os.makedirs(qr_dir, exist_ok=True)
+    qr_data = f"TripTrek | Booking:{booking.id} | User:{booking.user.username} | Package:{booking.package.title}"
+    qrcode.make(qr_data).save(os.path.join(qr_dir, f"qr_{booking.id}.png"))
+    return f"qr/qr_{booking.id}.png"
+
+
+def ticket_context(booking):
+    return {
+        "booking": booking,
+        "user": booking.user,
+        "package": booking.package,
+        "qr_uri": settings.MEDIA_URL + booking.qr_code,
+        "generated_at": timezone.now(),
+    }
+
+
+def render_ticket_html(booking):
+    return render_to_string("booking/booking_ticket.html", ticket_context(booking))
+
+
+def render_tickets(bookings):
+    """Batch API: return ``{booking.id: pdf_bytes}`` for every booking, rendered across the pool."""
+    bookings = list(bookings)
+    pdfs = render_many([render_ticket_html(booking) for booking in bookings])
+    return {booking.id: pdf for booking, pdf in zip(bookings, pdfs)}
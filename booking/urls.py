@@ -11,6 +11,7 @@ urlpatterns = [
     path("destinations/", views.destination_list, name="destination_list"),
     path("destination/<slug:slug>/", views.destination_detail, name="destination_detail"),
     path("package/<slug:slug>/", views.package_detail, name="package_detail"),
+    path("package/<int:package_id>/availability/", views.package_availability, name="package_availability"),
     path("holidays/", views.holiday_packages, name="holiday_packages"),
     path("hotels/", views.hotels, name="hotels"),
     path("flights/", views.flights, name="flights"),
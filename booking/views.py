@@ -2,18 +2,19 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse, FileResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404, StreamingHttpResponse
 from django.template.loader import render_to_string
-from django.utils import timezone
 from django.conf import settings
 from booking.models import Destination, Package, Booking, Offer, Payment
 from .forms import CustomSignupForm
+from .ratelimit import ratelimit
+from . import availability, payments, summaries, tickets
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import EmailMessage
-from django.db.models import Q
-import razorpay
-import qrcode
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from io import BytesIO
-from xhtml2pdf import pisa
 import os
 
 import hmac
@@ -37,15 +38,31 @@ def destination_list(request):
 
 def destination_detail(request, slug):
     dest = get_object_or_404(Destination, slug=slug)
-    packages = dest.packages.all()
+    packages = dest.packages.cards()
     return render(request, "booking/destination_detail.html", {"destination": dest, "packages": packages})
 
 def package_detail(request, slug):
     package = get_object_or_404(Package, slug=slug)
-    return render(request, "booking/package_detail.html", {"package": package})
+    return render(request, "booking/package_detail.html", {
+        "package": package,
+        "live_availability": getattr(settings, "AVAILABILITY_STREAM_ENABLED", False),
+    })
+
+async def package_availability(request, package_id):
+    # Server-sent events; needs the ASGI app (triptrek.asgi) to hold connections open cheaply.
+    # Under WSGI every open stream would pin a worker thread forever, so refuse it there.
+    if not getattr(settings, "AVAILABILITY_STREAM_ENABLED", False) or not isinstance(request, ASGIRequest):
+        raise Http404("Live availability is not enabled")
+    slots = await Package.objects.filter(id=package_id).values_list("available_slots", flat=True).afirst()
+    if slots is None:
+        raise Http404("Package not found")
+    response = StreamingHttpResponse(availability.stream(package_id, slots), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 def holiday_packages(request):
-    packages = Package.objects.all()
+    packages = Package.objects.cards()
     return render(request, "booking/holiday_packages.html", {"packages": packages})
 
 def hotels(request):
@@ -61,6 +78,7 @@ def offers(request):
 def contact_view(request):
     return render(request, "booking/contact.html")
 
+@ratelimit("search")
 def search(request):
     query = request.GET.get("q", "")
     destinations = Destination.objects.filter(
@@ -68,7 +86,7 @@ def search(request):
     )
     packages = Package.objects.filter(
         Q(title__icontains=query) | Q(description__icontains=query)
-    )
+    ).cards()
     return render(request, "booking/search_results.html", {
         "query": query,
         "destinations": destinations,
@@ -78,6 +96,7 @@ def search(request):
 # ----------------------------
 # AUTH
 # ----------------------------
+@ratelimit("signup", methods=("POST",))
 def signup_view(request):
     if request.method == "POST":
         form = CustomSignupForm(request.POST)
@@ -91,6 +110,7 @@ def signup_view(request):
         form = CustomSignupForm()
     return render(request, "booking/signup.html", {"form": form})
 
+@ratelimit("login", methods=("POST",))
 def login_view(request):
     if request.method == "POST":
         form = AuthenticationForm(request, data=request.POST)
@@ -107,12 +127,15 @@ def logout_view(request):
 
 @login_required
 def profile_view(request):
-    return render(request, "booking/profile.html")
+    return render(request, "booking/profile.html", {"summary": summaries.get_summary(request.user)})
 
 @login_required
 def booking_list(request):
     bookings = Booking.objects.filter(user=request.user).order_by("-booking_time")
-    return render(request, "booking/booking_list.html", {"bookings": bookings})
+    return render(request, "booking/booking_list.html", {
+        "bookings": bookings,
+        "summary": summaries.get_summary(request.user),
+    })
 
 # ----------------------------
 # BOOKING
@@ -142,20 +165,18 @@ def book_package(request, package_id):
 # ----------------------------
 # PAYMENT
 # ----------------------------
+@ratelimit("payment")
 @login_required
 def make_payment(request, booking_id):
     booking = get_object_or_404(Booking, id=booking_id, user=request.user)
     if hasattr(booking, "payment") and booking.payment.paid:
         return redirect("booking_list")
+    if booking.status == "CANCELLED":
+        # Expired by expire_bookings; don't open a gateway order nobody can complete.
+        return HttpResponse("This booking has expired. Please book the package again.", status=409)
 
     amount_paise = int(booking.total_amount * 100)
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-    razorpay_order = client.order.create({
-        "amount": amount_paise,
-        "currency": "INR",
-        "receipt": f"booking_{booking.id}",
-        "payment_capture": 1,
-    })
+    razorpay_order = payments.create_order(booking, amount_paise)
 
     payment_obj, _ = Payment.objects.get_or_create(
         booking=booking,
@@ -199,11 +220,28 @@ def verify_payment(request):
         ).hexdigest()
 
         if generated_signature == razorpay_signature:
-            payment.razorpay_payment_id = razorpay_payment_id
-            payment.paid = True
-            payment.save()
+            with transaction.atomic():
+                # Record the capture even if the booking can't be confirmed, so it can be refunded.
+                payment.razorpay_payment_id = razorpay_payment_id
+                payment.paid = True
+                payment.save()
+                # Status-guarded so concurrent or retried verifications count the booking once,
+                # and a booking the expiry sweep has cancelled is never revived.
+                newly_confirmed = Booking.objects.filter(pk=booking.pk, status="PENDING").update(status="CONFIRMED")
+                if newly_confirmed:
+                    Package.objects.filter(pk=booking.package_id).update(
+                        available_slots=Greatest(F("available_slots") - booking.travelers, 0)
+                    )
+                    summaries.record_confirmed(booking)
+                else:
+                    booking.status = Booking.objects.values_list("status", flat=True).get(pk=booking.pk)
+            if booking.status == "CANCELLED":
+                return JsonResponse({
+                    "status": "failure",
+                    "message": "This booking expired before the payment completed. The payment will be refunded.",
+                }, status=409)
             booking.status = "CONFIRMED"
-            booking.save()
+            availability.notify(booking.package_id)
             generate_ticket(booking)
             send_ticket_email(booking)
             return JsonResponse({"status": "success"})
@@ -214,37 +252,29 @@ def verify_payment(request):
 # TICKET & PDF
 # ----------------------------
 def generate_ticket(booking):
-    qr_dir = os.path.join(settings.MEDIA_ROOT, "qr")
-    os.makedirs(qr_dir, exist_ok=True)
-    qr_data = f"TripTrek | Booking:{booking.id} | User:{booking.user.username} | Package:{booking.package.title}"
-    qr = qrcode.make(qr_data)
-    qr_path = os.path.join(qr_dir, f"qr_{booking.id}.png")
-    qr.save(qr_path)
-    booking.qr_code = f"qr/qr_{booking.id}.png"
+    booking.qr_code = tickets.generate_qr(booking)
     booking.save()
 
 def render_to_pdf(template_src, context_dict):
     html = render_to_string(template_src, context_dict)
-    result = BytesIO()
-    pdf = pisa.CreatePDF(html, dest=result)
-    if pdf.err:
+    pdf = tickets.render_pdf(html)
+    if pdf is None:
         return None
-    result.seek(0)
-    return result
+    return BytesIO(pdf)
 
 def send_ticket_email(booking):
-    context = {
-        "booking": booking,
-        "user": booking.user,
-        "package": booking.package,
-        "qr_uri": settings.MEDIA_URL + booking.qr_code,
-        "generated_at": timezone.now(),
-    }
-    pdf = render_to_pdf("booking/booking_ticket.html", context)
+    # The payment is already confirmed; a busy or failing renderer must not turn that
+    # into an error. Send the confirmation without the PDF and point to the download.
+    try:
+        pdf = render_to_pdf("booking/booking_ticket.html", tickets.ticket_context(booking))
+    except tickets.PdfRenderError:
+        pdf = None
+    ticket_note = "Your ticket is attached in PDF format." if pdf else "You can download your ticket from My Bookings."
     subject = f"TripTrek Ticket Confirmation - Booking #{booking.id}"
-    body = f"Hello {booking.user.get_full_name() or booking.user.username},\n\nYour booking is CONFIRMED ✅\n\nPackage: {booking.package.title}\nTravelers: {booking.travelers}\nBooking ID: {booking.id}\nAmount Paid: ₹{booking.total_amount}\n\nYour ticket is attached in PDF format.\nThank you for choosing TripTrek!"
+    body = f"Hello {booking.user.get_full_name() or booking.user.username},\n\nYour booking is CONFIRMED ✅\n\nPackage: {booking.package.title}\nTravelers: {booking.travelers}\nBooking ID: {booking.id}\nAmount Paid: ₹{booking.total_amount}\n\n{ticket_note}\nThank you for choosing TripTrek!"
     email = EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [booking.user.email])
-    email.attach(f"ticket_{booking.id}.pdf", pdf.getvalue(), "application/pdf")
+    if pdf:
+        email.attach(f"ticket_{booking.id}.pdf", pdf.getvalue(), "application/pdf")
     email.send(fail_silently=False)
 
 @login_required
@@ -259,14 +289,12 @@ def download_ticket(request, booking_id):
     if not os.path.exists(pdf_filepath):
         if not booking.qr_code:
             generate_ticket(booking)
-        context = {
-            "booking": booking,
-            "user": booking.user,
-            "package": booking.package,
-            "qr_uri": settings.MEDIA_URL + booking.qr_code,
-            "generated_at": timezone.now(),
-        }
-        pdf = render_to_pdf("booking/booking_ticket.html", context)
+        try:
+            pdf = render_to_pdf("booking/booking_ticket.html", tickets.ticket_context(booking))
+        except tickets.PdfRenderError:
+            response = HttpResponse("Ticket is being generated. Please try again in a moment.", status=503)
+            response["Retry-After"] = "5"
+            return response
         with open(pdf_filepath, "wb") as f:
             f.write(pdf.getvalue())
     return FileResponse(open(pdf_filepath, "rb"), as_attachment=True, filename=pdf_filename)
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'booking.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,6 +87,23 @@ DATABASES = {
     }
 }
 
+# Read replicas for catalogue pages (booking/routers.py). Add each replica to
+# DATABASES and list its alias in DATABASE_REPLICAS; with no replicas listed
+# every query uses "default". "replica1" is a local SQLite replica: set
+# DATABASE_REPLICAS = ['replica1'] and run `manage.py sync_replicas --interval 1`
+# to keep it in sync with the primary. In tests it mirrors "default".
+DATABASES['replica1'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db.replica1.sqlite3',
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['booking.routers.PrimaryReplicaRouter']
+
+# How long a user keeps reading from the primary after one of their writes.
+REPLICA_PIN_COOKIE = "primary_pin"
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -152,6 +170,56 @@ LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
 
+# Ticket PDF rendering (booking/tickets.py). xhtml2pdf runs in a pool of warm
+# worker processes; set TICKET_PDF_WORKERS = 0 to render in the request thread.
+TICKET_PDF_WORKERS = 2
+TICKET_PDF_QUEUE_SIZE = 8     # renders allowed to wait for a free worker
+TICKET_PDF_QUEUE_WAIT = 1     # seconds to wait for a queue slot before answering 503
+TICKET_PDF_TIMEOUT = 30       # seconds before a render is abandoned
+
+# Live seat availability over server-sent events (booking/availability.py, ASGI only)
+AVAILABILITY_STREAM_ENABLED = False   # turn on only when serving triptrek.asgi; WSGI workers would hang
+AVAILABILITY_POLL_SECONDS = 5         # how often watched packages are re-read
+AVAILABILITY_COALESCE_SECONDS = 0.25  # notifications within this window share one push
+AVAILABILITY_HEARTBEAT_SECONDS = 15   # keep-alive comment on idle streams
+
+# Booking expiry (manage.py expire_bookings)
+PENDING_BOOKING_TTL_MINUTES = 30
+BOOKING_ARCHIVE_AFTER_DAYS = 90
+
+# Caches. "ratelimit" is file-based so every worker process on the host sees
+# the same counters; it is dedicated to the limiter because resetting it
+# clears the whole alias. CounterFileCache increments under a file lock and
+# culls expired counters before live ones; size MAX_ENTRIES well above
+# clients x policies x 2 windows.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ratelimit': {
+        'BACKEND': 'booking.cache.CounterFileCache',
+        'LOCATION': BASE_DIR / 'cache' / 'ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Rate limiting (booking/ratelimit.py)
+# "memory" keeps token buckets per process; "cache" shares sliding windows
+# through the RATELIMIT_CACHE_ALIAS cache across every worker on the host.
+RATELIMIT_ENABLED = True
+RATELIMIT_BACKEND = "memory"
+RATELIMIT_CACHE_ALIAS = "ratelimit"
+# Behind a proxy, set this to "HTTP_X_FORWARDED_FOR" and RATELIMIT_PROXY_COUNT
+# to the number of proxies in front of Django that append to it.
+RATELIMIT_IP_META_KEY = "REMOTE_ADDR"
+RATELIMIT_PROXY_COUNT = 1
+RATELIMIT_POLICIES = {
+    "search": [("ip", "30/m")],
+    "login": [("ip", "10/m")],
+    "signup": [("ip", "5/m")],
+    "payment": [("ip", "20/m"), ("user", "10/m")],
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 